@@ -1,31 +1,290 @@
+import json
 import os
+import sqlite3
+from collections import deque
+import h3
+import orjson
+import redis
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from flask import Flask, request, jsonify, session, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 from flask_session import Session
+from flask_caching import Cache
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from werkzeug.exceptions import HTTPException, NotFound
+from werkzeug.security import check_password_hash
 from datetime import datetime
+from typing import Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, model_validator
+from pydantic_core import PydanticCustomError
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes and decodes with orjson"""
+    
+    def _options(self):
+        return orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+        
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+        
+    def response(self, *args, **kwargs):
+        # orjson already returns bytes, so skip the str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self._options())
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 # Initialize Flask app with static files
 app = Flask(__name__, static_folder='dist/public', static_url_path='')
+app.json = OrjsonProvider(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('SESSION_SECRET', 'rideshare-secret-key')
-# Use default SQLite database if DATABASE_URL is not set
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///rideshare.db')
+# Use default SQLite database if DATABASE_URL is not set; production runs on PostgreSQL
+database_url = os.getenv('DATABASE_URL', 'sqlite:///rideshare.db')
+# Hosted providers often hand out postgres:// URLs, which SQLAlchemy no longer accepts
+if database_url.startswith('postgres://'):
+    database_url = 'postgresql+psycopg2://' + database_url[len('postgres://'):]
+app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SESSION_TYPE'] = 'filesystem'
+# Larger compiled statement cache so the hot queries are never recompiled
+engine_options = {'query_cache_size': 1200}
+# Size the connection pool for multi-worker/multi-thread servers; SQLite keeps its defaults
+if not database_url.startswith('sqlite'):
+    engine_options.update({
+        'pool_size': 20,
+        'max_overflow': 40,
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+        'pool_pre_ping': True
+    })
+# Batch executemany() inserts into multi-row VALUES statements on psycopg2
+if database_url.startswith(('postgresql://', 'postgresql+psycopg2://')):
+    engine_options['executemany_mode'] = 'values_plus_batch'
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
 app.config['SESSION_PERMANENT'] = False
 
+# Use Redis for sessions when REDIS_URL is set (e.g. unix:///var/run/redis/redis.sock),
+# otherwise fall back to filesystem sessions for local development
+REDIS_URL = os.getenv('REDIS_URL')
+redis_client = redis.Redis.from_url(REDIS_URL) if REDIS_URL else None
+if redis_client is not None:
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = redis_client
+else:
+    app.config['SESSION_TYPE'] = 'filesystem'
+
+# Cache hot read-only queries in Redis when available, in-process otherwise
+if REDIS_URL:
+    app.config['CACHE_TYPE'] = 'RedisCache'
+    app.config['CACHE_REDIS_URL'] = REDIS_URL
+else:
+    app.config['CACHE_TYPE'] = 'SimpleCache'
+app.config['CACHE_DEFAULT_TIMEOUT'] = 60
+
+# Share rate limit counters through Redis when available
+if REDIS_URL:
+    app.config['RATELIMIT_STORAGE_URI'] = (
+        'redis+' + REDIS_URL if REDIS_URL.startswith('unix://') else REDIS_URL
+    )
+else:
+    app.config['RATELIMIT_STORAGE_URI'] = 'memory://'
+
 # Initialize extensions
 db = SQLAlchemy(app)
 Session(app)
+cache = Cache(app)
+limiter = Limiter(get_remote_address, app=app)
 CORS(app, supports_credentials=True)
 
+# Serialization schemas
+# Field names match the model attributes (read with from_attributes) and are
+# dumped under the camelCase keys the frontend expects. SQLite does not enforce
+# integer columns, so numeric fields also accept floats stored by older versions
+Number = Union[int, float]
+
+class UserOut(BaseModel):
+    """Public user fields (excluding password)"""
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    first_name: str = Field(serialization_alias='firstName')
+    last_name: str = Field(serialization_alias='lastName')
+    email: str
+    phone: str
+    role: str
+    rating: Optional[Number]
+    total_rides: Optional[Number] = Field(serialization_alias='totalRides')
+    created_at: Optional[datetime] = Field(serialization_alias='createdAt')
+
+class RideOut(BaseModel):
+    """Ride fields"""
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    driver_id: int = Field(serialization_alias='driverId')
+    origin: str
+    destination: str
+    date: str
+    time: str
+    available_seats: Number = Field(serialization_alias='availableSeats')
+    price: Number
+    vehicle_type: str = Field(serialization_alias='vehicleType')
+    notes: Optional[str]
+    status: Optional[str]
+    created_at: Optional[datetime] = Field(serialization_alias='createdAt')
+
+class RideWithDriverOut(RideOut):
+    """Ride fields with the driver's public data"""
+    driver: UserOut
+
+class RideRequestOut(BaseModel):
+    """Ride request fields"""
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    ride_id: int = Field(serialization_alias='rideId')
+    rider_id: int = Field(serialization_alias='riderId')
+    seats: Number
+    message: Optional[str]
+    status: Optional[str]
+    created_at: Optional[datetime] = Field(serialization_alias='createdAt')
+
+class RideRequestWithRiderOut(RideRequestOut):
+    """Ride request fields with the rider's public data"""
+    rider: UserOut
+
+class RideRequestWithRideOut(RideRequestOut):
+    """Ride request fields with the ride and its driver"""
+    ride: RideWithDriverOut
+
+class RideRequestWithRiderAndRideOut(RideRequestWithRideOut):
+    """Ride request fields with the rider, the ride and its driver"""
+    rider: UserOut
+
+def dump_schema(schema, obj):
+    """Serialize a model object through a schema to a JSON-ready dict"""
+    return schema.model_validate(obj).model_dump(mode='json', by_alias=True)
+
+def dump_list(adapter, objects):
+    """Serialize a list of model objects through a list TypeAdapter in one pass"""
+    return adapter.dump_python(
+        adapter.validate_python(objects, from_attributes=True), mode='json', by_alias=True
+    )
+
+ride_list_adapter = TypeAdapter(list[RideOut])
+driver_request_list_adapter = TypeAdapter(list[RideRequestWithRiderAndRideOut])
+rider_request_list_adapter = TypeAdapter(list[RideRequestWithRideOut])
+
+# Request body and query schemas
+# Bodies are checked and coerced before anything is written, so stored rows
+# always serialize; aliases are the camelCase keys the frontend sends
+class CoordinatesIn(BaseModel):
+    """Optional origin/destination coordinates, each given as a complete lat/lng pair"""
+    origin_lat: Optional[float] = Field(None, ge=-90, le=90, allow_inf_nan=False, alias='originLat')
+    origin_lng: Optional[float] = Field(None, ge=-180, le=180, allow_inf_nan=False, alias='originLng')
+    destination_lat: Optional[float] = Field(None, ge=-90, le=90, allow_inf_nan=False, alias='destinationLat')
+    destination_lng: Optional[float] = Field(None, ge=-180, le=180, allow_inf_nan=False, alias='destinationLng')
+    
+    @model_validator(mode='after')
+    def check_pairs(self):
+        if (self.origin_lat is None) != (self.origin_lng is None):
+            raise PydanticCustomError('coordinates', 'originLat and originLng must be given together')
+        if (self.destination_lat is None) != (self.destination_lng is None):
+            raise PydanticCustomError('coordinates', 'destinationLat and destinationLng must be given together')
+        return self
+
+class RideIn(CoordinatesIn):
+    """Body for posting a ride"""
+    origin: str
+    destination: str
+    date: str
+    time: str
+    available_seats: int = Field(gt=0, alias='availableSeats')
+    price: int = Field(ge=0)
+    vehicle_type: str = Field(alias='vehicleType')
+    notes: Optional[str] = ''
+
+class RideSearchIn(CoordinatesIn):
+    """Query parameters for searching rides"""
+    origin: str = ''
+    destination: str = ''
+    date: str = ''
+
+class RideRequestIn(BaseModel):
+    """Body for requesting seats on a ride"""
+    ride_id: int = Field(alias='rideId')
+    seats: int = Field(gt=0)
+    message: Optional[str] = ''
+
+class RegisterIn(BaseModel):
+    """Body for registering a user"""
+    first_name: str = Field(alias='firstName')
+    last_name: str = Field(alias='lastName')
+    email: str
+    phone: str
+    password: str
+    role: str
+
+class LoginIn(BaseModel):
+    """Body for logging in"""
+    email: str
+    password: str
+
+class InvalidRequest(Exception):
+    """Raised for request bodies or parameters that fail validation (reported as a 400)"""
+
+def get_json_object():
+    """Get the JSON request body, rejecting anything that is not an object"""
+    data = request.get_json()
+    if not isinstance(data, dict):
+        raise InvalidRequest('Request body must be a JSON object')
+    return data
+
+def validate_input(schema, data):
+    """Validate and coerce request data with an input schema, raising InvalidRequest"""
+    try:
+        return schema.model_validate(data)
+    except ValidationError as e:
+        error = e.errors()[0]
+        if not error['loc']:
+            # Checks spanning several fields carry their own message
+            raise InvalidRequest(error['msg'])
+        field = error['loc'][0]
+        if error['type'] == 'missing':
+            raise InvalidRequest(f'Missing field: {field}')
+        raise InvalidRequest(f'Invalid field: {field}')
+
+def parse_body(schema):
+    """Validate and coerce the JSON request body with an input schema"""
+    return validate_input(schema, get_json_object())
+
+def parse_args(schema):
+    """Validate and coerce the query string with an input schema"""
+    return validate_input(schema, request.args.to_dict())
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL journaling on SQLite so readers don't block the writer"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.close()
+
 # Models
 class User(db.Model):
     """User model representing both drivers and riders"""
@@ -42,75 +301,67 @@ class User(db.Model):
     total_rides = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relationships
-    rides_as_driver = db.relationship('Ride', backref='driver', lazy=True)
-    ride_requests = db.relationship('RideRequest', backref='rider', lazy=True)
+    # Relationships raise instead of lazy loading, so every query has to eager
+    # load what it serializes (joinedload/selectinload) and N+1 queries fail loudly
+    rides_as_driver = db.relationship(
+        'Ride', backref=db.backref('driver', lazy='raise_on_sql'), lazy='raise_on_sql'
+    )
+    ride_requests = db.relationship(
+        'RideRequest', backref=db.backref('rider', lazy='raise_on_sql'), lazy='raise_on_sql'
+    )
     
     def to_dict(self):
         """Convert user object to dictionary (excluding password)"""
-        return {
-            'id': self.id,
-            'firstName': self.first_name,
-            'lastName': self.last_name,
-            'email': self.email,
-            'phone': self.phone,
-            'role': self.role,
-            'rating': self.rating,
-            'totalRides': self.total_rides,
-            'createdAt': self.created_at.isoformat() if self.created_at else None
-        }
+        return dump_schema(UserOut, self)
 
 class Ride(db.Model):
     """Ride model representing ride offers from drivers"""
     __tablename__ = 'rides'
+    __table_args__ = (
+        # Serves the search filter on status/date and its ORDER BY created_at
+        db.Index('ix_rides_status_date_created', 'status', 'date', 'created_at'),
+        # Covers only bookable rides, which is all the search ever reads
+        db.Index('ix_rides_active_search', 'status', 'date',
+                 postgresql_where=db.text("status = 'active' AND available_seats > 0")).ddl_if(dialect='postgresql'),
+        # Trigram indexes back the ILIKE '%...%' origin/destination search on PostgreSQL
+        db.Index('ix_rides_origin_trgm', 'origin', postgresql_using='gin',
+                 postgresql_ops={'origin': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_rides_destination_trgm', 'destination', postgresql_using='gin',
+                 postgresql_ops={'destination': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    driver_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    driver_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     origin = db.Column(db.String(200), nullable=False)
     destination = db.Column(db.String(200), nullable=False)
+    # H3 cells of the origin/destination coordinates, when the client sends them
+    origin_h3 = db.Column(db.String(16), index=True)
+    destination_h3 = db.Column(db.String(16), index=True)
     date = db.Column(db.String(20), nullable=False)
     time = db.Column(db.String(10), nullable=False)
     available_seats = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Integer, nullable=False)
     vehicle_type = db.Column(db.String(50), nullable=False)
     notes = db.Column(db.Text)
-    status = db.Column(db.String(20), default='active')  # 'active', 'completed', 'cancelled'
+    status = db.Column(db.String(20), default='active')  # 'active', 'full', 'completed', 'cancelled'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Relationships
-    requests = db.relationship('RideRequest', backref='ride', lazy=True)
+    # Relationships (see User for why these raise on lazy loads)
+    requests = db.relationship(
+        'RideRequest', backref=db.backref('ride', lazy='raise_on_sql'), lazy='raise_on_sql'
+    )
     
     def to_dict(self, include_driver=False):
         """Convert ride object to dictionary"""
-        result = {
-            'id': self.id,
-            'driverId': self.driver_id,
-            'origin': self.origin,
-            'destination': self.destination,
-            'date': self.date,
-            'time': self.time,
-            'availableSeats': self.available_seats,
-            'price': self.price,
-            'vehicleType': self.vehicle_type,
-            'notes': self.notes,
-            'status': self.status,
-            'createdAt': self.created_at.isoformat() if self.created_at else None
-        }
-        
-        if include_driver:
-            driver = User.query.get(self.driver_id)
-            if driver:
-                result['driver'] = driver.to_dict()
-            
-        return result
+        return dump_schema(RideWithDriverOut if include_driver else RideOut, self)
 
 class RideRequest(db.Model):
     """Ride request model representing requests from riders to join rides"""
     __tablename__ = 'ride_requests'
     
     id = db.Column(db.Integer, primary_key=True)
-    ride_id = db.Column(db.Integer, db.ForeignKey('rides.id'), nullable=False)
-    rider_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    ride_id = db.Column(db.Integer, db.ForeignKey('rides.id'), nullable=False, index=True)
+    rider_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     seats = db.Column(db.Integer, nullable=False)
     message = db.Column(db.Text)
     status = db.Column(db.String(20), default='pending')  # 'pending', 'accepted', 'declined'
@@ -118,36 +369,38 @@ class RideRequest(db.Model):
     
     def to_dict(self, include_rider=False, include_ride=False):
         """Convert ride request object to dictionary"""
-        result = {
-            'id': self.id,
-            'rideId': self.ride_id,
-            'riderId': self.rider_id,
-            'seats': self.seats,
-            'message': self.message,
-            'status': self.status,
-            'createdAt': self.created_at.isoformat() if self.created_at else None
-        }
-        
-        if include_rider:
-            rider = User.query.get(self.rider_id)
-            if rider:
-                result['rider'] = rider.to_dict()
-            
-        if include_ride:
-            ride = Ride.query.get(self.ride_id)
-            if ride:
-                result['ride'] = ride.to_dict(include_driver=True)
-            
-        return result
+        if include_rider and include_ride:
+            schema = RideRequestWithRiderAndRideOut
+        elif include_rider:
+            schema = RideRequestWithRiderOut
+        elif include_ride:
+            schema = RideRequestWithRideOut
+        else:
+            schema = RideRequestOut
+        return dump_schema(schema, self)
+
+# The trigram indexes need the pg_trgm extension before the tables are created
+event.listen(
+    db.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
 
 # Data Structure Classes demonstrating Python data structures usage
 class RideShareDataStructures:
     """Class demonstrating various Python data structures for ride sharing"""
     
+    # Tuple: For immutable coordinate pairs and grouped data
+    popular_routes = [
+        ("Mumbai Central", "Bandra"),
+        ("Pune Station", "Hadapsar"),
+        ("Delhi CP", "Gurgaon")
+    ]
+    
     def __init__(self):
         # List: For storing collections of data with order
         self.active_rides = []  # List of active ride IDs
-        self.search_history = []  # List of recent searches
+        self.search_history = deque(maxlen=10)  # Recent searches, oldest dropped automatically
         
         # Dictionary: For fast lookups and key-value mapping
         self.user_sessions = {}  # {user_id: session_data}
@@ -159,12 +412,13 @@ class RideShareDataStructures:
         self.active_drivers = set()  # Set of currently active driver IDs
         self.blocked_users = set()  # Set of blocked user IDs
         
-        # Tuple: For immutable coordinate pairs and grouped data
-        self.popular_routes = [
-            ("Mumbai Central", "Bandra"),
-            ("Pune Station", "Hadapsar"),
-            ("Delhi CP", "Gurgaon")
-        ]
+        self._build_route_index()
+        
+    def _build_route_index(self):
+        """Index popular route destinations by lowercased origin (dictionary of lists)"""
+        self._routes_by_origin = {}
+        for route_origin, route_dest in self.popular_routes:
+            self._routes_by_origin.setdefault(route_origin.lower(), []).append(route_dest)
         
     def add_user_email(self, email):
         """Add email to unique set (demonstrates set usage)"""
@@ -173,27 +427,188 @@ class RideShareDataStructures:
         self.unique_emails.add(email)
         return True
         
+    def remove_user_email(self, email):
+        """Release an email, e.g. when its registration failed"""
+        self.unique_emails.discard(email)
+        
+    def start_user_session(self, user_id, session_data):
+        """Store session data for a user (demonstrates dictionary usage)"""
+        self.user_sessions[user_id] = session_data
+        
+    def end_user_session(self, user_id):
+        """Remove session data and active driver status for a user"""
+        self.active_drivers.discard(user_id)
+        self.user_sessions.pop(user_id, None)
+        
+    def add_active_driver(self, driver_id):
+        """Mark a driver as active (demonstrates set usage)"""
+        self.active_drivers.add(driver_id)
+        
+    def add_active_ride(self, ride_id, driver_id):
+        """Track a new active ride and map it to its driver"""
+        self.active_rides.append(ride_id)
+        if driver_id not in self.driver_rides:
+            self.driver_rides[driver_id] = []
+        self.driver_rides[driver_id].append(ride_id)
+        
+    def remove_active_ride(self, ride_id):
+        """Stop tracking a ride as active (demonstrates list usage)"""
+        if ride_id in self.active_rides:
+            self.active_rides.remove(ride_id)
+        
     def cache_ride(self, ride_id, ride_data):
         """Cache ride data (demonstrates dictionary usage)"""
         self.ride_cache[ride_id] = ride_data
         
+    def cache_rides(self, rides):
+        """Cache several ride dictionaries keyed by their id"""
+        for ride in rides:
+            self.cache_ride(ride['id'], ride)
+        
+    def register_ride(self, ride_id, driver_id, ride_data):
+        """Track a newly created ride as active and cache it"""
+        self.add_active_ride(ride_id, driver_id)
+        self.cache_ride(ride_id, ride_data)
+        
     def add_to_search_history(self, search_params):
-        """Add search to history (demonstrates list usage)"""
-        # Keep only last 10 searches
-        if len(self.search_history) >= 10:
-            self.search_history.pop(0)  # Remove oldest
+        """Add search to history (demonstrates bounded queue usage)"""
+        # The deque keeps only the last 10 searches
         self.search_history.append(search_params)
         
+    def get_recent_searches(self, count=3):
+        """Get the most recent searches, oldest first"""
+        return list(self.search_history)[-count:]
+        
     def get_popular_route_suggestions(self, origin):
-        """Get route suggestions (demonstrates tuple usage)"""
-        suggestions = []
-        for route_origin, route_dest in self.popular_routes:
-            if route_origin.lower() == origin.lower():
-                suggestions.append(route_dest)
-        return suggestions
+        """Get route suggestions (demonstrates tuple and dictionary usage)"""
+        return list(self._routes_by_origin.get(origin.lower(), []))
+        
+    def get_stats(self):
+        """Get the size of each data structure"""
+        return {
+            'active_rides': len(self.active_rides),
+            'search_history': len(self.search_history),
+            'user_sessions': len(self.user_sessions),
+            'ride_cache': len(self.ride_cache),
+            'driver_rides': len(self.driver_rides),
+            'unique_emails': len(self.unique_emails),
+            'active_drivers': len(self.active_drivers),
+            'blocked_users': len(self.blocked_users),
+            'popular_routes': len(self.popular_routes)
+        }
 
-# Initialize data structures
-ride_data = RideShareDataStructures()
+class RedisRideShareDataStructures(RideShareDataStructures):
+    """Same data structures backed by Redis so they are shared across workers
+    
+    Lists, hashes and sets map onto the matching Redis types under a common
+    key prefix; values are stored as JSON.
+    """
+    
+    def __init__(self, client, prefix='rideshare:', ride_cache_ttl=3600):
+        self.redis = client
+        self.prefix = prefix
+        self.ride_cache_ttl = ride_cache_ttl
+        self._build_route_index()
+        
+    def _key(self, name):
+        return f'{self.prefix}{name}'
+        
+    def add_user_email(self, email):
+        """Add email to the Redis set, returning False if already present"""
+        return self.redis.sadd(self._key('unique_emails'), email) == 1
+        
+    def remove_user_email(self, email):
+        """Remove email from the Redis set"""
+        self.redis.srem(self._key('unique_emails'), email)
+        
+    def start_user_session(self, user_id, session_data):
+        """Store session data in the Redis hash"""
+        self.redis.hset(self._key('user_sessions'), user_id, json.dumps(session_data))
+        
+    def end_user_session(self, user_id):
+        """Remove session data and active driver status for a user"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.srem(self._key('active_drivers'), user_id)
+        pipe.hdel(self._key('user_sessions'), user_id)
+        pipe.execute()
+        
+    def add_active_driver(self, driver_id):
+        """Add driver to the Redis set"""
+        self.redis.sadd(self._key('active_drivers'), driver_id)
+        
+    def add_active_ride(self, ride_id, driver_id):
+        """Track a new active ride and map it to its driver"""
+        pipe = self.redis.pipeline(transaction=False)
+        self._queue_active_ride(pipe, ride_id, driver_id)
+        pipe.execute()
+        
+    def _queue_active_ride(self, pipe, ride_id, driver_id):
+        pipe.rpush(self._key('active_rides'), ride_id)
+        pipe.rpush(self._key(f'driver_rides:{driver_id}'), ride_id)
+        pipe.sadd(self._key('driver_rides'), driver_id)
+        
+    def remove_active_ride(self, ride_id):
+        """Remove ride from the Redis list"""
+        self.redis.lrem(self._key('active_rides'), 0, ride_id)
+        
+    def cache_ride(self, ride_id, ride_data):
+        """Cache ride data in the Redis hash, expiring idle caches"""
+        pipe = self.redis.pipeline(transaction=False)
+        self._queue_ride_cache(pipe, {ride_id: json.dumps(ride_data)})
+        pipe.execute()
+        
+    def cache_rides(self, rides):
+        """Cache several rides with one HSET in a single round trip"""
+        if not rides:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        self._queue_ride_cache(pipe, {ride['id']: json.dumps(ride) for ride in rides})
+        pipe.execute()
+        
+    def register_ride(self, ride_id, driver_id, ride_data):
+        """Track and cache a newly created ride in a single round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        self._queue_active_ride(pipe, ride_id, driver_id)
+        self._queue_ride_cache(pipe, {ride_id: json.dumps(ride_data)})
+        pipe.execute()
+        
+    def _queue_ride_cache(self, pipe, mapping):
+        key = self._key('ride_cache')
+        pipe.hset(key, mapping=mapping)
+        if self.ride_cache_ttl:
+            pipe.expire(key, self.ride_cache_ttl)
+        
+    def add_to_search_history(self, search_params):
+        """Add search to history, trimming to the last 10 on the server"""
+        key = self._key('search_history')
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.rpush(key, json.dumps(search_params))
+        pipe.ltrim(key, -10, -1)
+        pipe.execute()
+        
+    def get_recent_searches(self, count=3):
+        """Get the most recent searches, oldest first"""
+        return [json.loads(item) for item in self.redis.lrange(self._key('search_history'), -count, -1)]
+        
+    def get_stats(self):
+        """Get the size of each data structure in a single round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.llen(self._key('active_rides'))
+        pipe.llen(self._key('search_history'))
+        pipe.hlen(self._key('user_sessions'))
+        pipe.hlen(self._key('ride_cache'))
+        pipe.scard(self._key('driver_rides'))
+        pipe.scard(self._key('unique_emails'))
+        pipe.scard(self._key('active_drivers'))
+        pipe.scard(self._key('blocked_users'))
+        names = ['active_rides', 'search_history', 'user_sessions', 'ride_cache', 'driver_rides',
+                 'unique_emails', 'active_drivers', 'blocked_users']
+        stats = dict(zip(names, pipe.execute()))
+        stats['popular_routes'] = len(self.popular_routes)
+        return stats
+
+# Initialize data structures, shared through Redis when it is configured
+ride_data = RedisRideShareDataStructures(redis_client) if redis_client is not None else RideShareDataStructures()
 
 # Authentication helper
 def require_auth(f):
@@ -205,371 +620,454 @@ def require_auth(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+# Password helpers
+# argon2-cffi's defaults (RFC 9106 low-memory profile); it releases the GIL while
+# hashing, so threaded workers can hash concurrently
+password_hasher = PasswordHasher()
+
+def hash_password(password):
+    """Hash a password with argon2id"""
+    return password_hasher.hash(password)
+
+def verify_password(password_hash, password):
+    """Check a password against an argon2 hash or a legacy Werkzeug hash"""
+    if password_hash.startswith('$argon2'):
+        try:
+            return password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(password_hash, password)
+
+def password_needs_rehash(password_hash):
+    """Check whether a stored hash is legacy or uses outdated argon2 parameters"""
+    if not password_hash.startswith('$argon2'):
+        return True
+    return password_hasher.check_needs_rehash(password_hash)
+
+# Geospatial helpers
+# Resolution 8 cells are ~0.7 km2, so a cell plus its ring covers roughly 1.5 km around a point
+H3_RESOLUTION = 8
+
+def h3_cell(lat, lng):
+    """Get the H3 cell for a coordinate (validated by CoordinatesIn), or None if not given"""
+    if lat is None or lng is None:
+        return None
+    return h3.latlng_to_cell(lat, lng, H3_RESOLUTION)
+
+def nearby_h3_cells(cell):
+    """Get a cell and its immediate neighbours"""
+    return h3.grid_disk(cell, 1)
+
+# Cached query helpers
+@cache.memoize(timeout=60)
+def find_active_rides(origin, destination, date, origin_cell=None, destination_cell=None):
+    """Find active rides matching the search filters (cached per filter combination)
+    
+    Selects plain columns joined with the driver instead of loading Ride/User
+    objects, so serializing a large result set is a single pass over rows.
+    """
+    query = db.session.query(
+        Ride.id, Ride.driver_id, Ride.origin, Ride.destination, Ride.date, Ride.time,
+        Ride.available_seats, Ride.price, Ride.vehicle_type, Ride.notes, Ride.status,
+        Ride.created_at, User.first_name, User.last_name, User.email, User.phone,
+        User.role, User.rating, User.total_rides, User.created_at.label('driver_created_at')
+    ).join(User, User.id == Ride.driver_id).filter(Ride.status == 'active', Ride.available_seats > 0)
+    
+    if origin:
+        query = query.filter(Ride.origin.ilike(f'%{origin}%'))
+    if destination:
+        query = query.filter(Ride.destination.ilike(f'%{destination}%'))
+    if date:
+        query = query.filter(Ride.date == date)
+    # Nearby search is an indexed IN over the target cell and its neighbours
+    if origin_cell:
+        query = query.filter(Ride.origin_h3.in_(nearby_h3_cells(origin_cell)))
+    if destination_cell:
+        query = query.filter(Ride.destination_h3.in_(nearby_h3_cells(destination_cell)))
+        
+    # Fetch in chunks (server-side cursor on PostgreSQL) so the raw rows are not
+    # buffered in full alongside the dicts built from them
+    rows = query.order_by(Ride.created_at.desc()).execution_options(stream_results=True).yield_per(500)
+    
+    # Drivers usually post several rides, so build each driver's dict once
+    drivers = {}
+    result = []
+    for row in rows:
+        driver = drivers.get(row.driver_id)
+        if driver is None:
+            driver = drivers[row.driver_id] = {
+                'id': row.driver_id,
+                'firstName': row.first_name,
+                'lastName': row.last_name,
+                'email': row.email,
+                'phone': row.phone,
+                'role': row.role,
+                'rating': row.rating,
+                'totalRides': row.total_rides,
+                'createdAt': row.driver_created_at.isoformat() if row.driver_created_at else None
+            }
+        result.append({
+            'id': row.id,
+            'driverId': row.driver_id,
+            'origin': row.origin,
+            'destination': row.destination,
+            'date': row.date,
+            'time': row.time,
+            'availableSeats': row.available_seats,
+            'price': row.price,
+            'vehicleType': row.vehicle_type,
+            'notes': row.notes,
+            'status': row.status,
+            'createdAt': row.created_at.isoformat() if row.created_at else None,
+            'driver': driver
+        })
+    return result
+
+@cache.memoize(timeout=300)
+def get_user_data(user_id):
+    """Get a user's public data by id (cached until the user changes)"""
+    user = User.query.get(user_id)
+    return user.to_dict() if user else None
+
 # Routes
 @app.route('/api/auth/register', methods=['POST'])
 def register():
     """Register a new user"""
-    try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['firstName', 'lastName', 'email', 'phone', 'password', 'role']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'message': f'Missing field: {field}'}), 400
-        
-        # Check if email already exists using our data structure
-        if not ride_data.add_user_email(data['email']):
-            return jsonify({'message': 'Email already registered'}), 400
-            
-        # Check if user exists in database
-        existing_user = User.query.filter_by(email=data['email']).first()
-        if existing_user:
-            return jsonify({'message': 'User already exists'}), 400
+    # Validate and coerce required fields
+    data = parse_body(RegisterIn)
+    
+    # Check if email already exists using our data structure
+    if not ride_data.add_user_email(data.email):
+        return jsonify({'message': 'Email already registered'}), 400
         
-        # Create new user
+    # Check if user exists in database
+    existing_user = User.query.filter_by(email=data.email).first()
+    if existing_user:
+        return jsonify({'message': 'User already exists'}), 400
+    
+    # Create new user
+    try:
         user = User(
-            first_name=data['firstName'],
-            last_name=data['lastName'],
-            email=data['email'],
-            phone=data['phone'],
-            password_hash=generate_password_hash(data['password']),
-            role=data['role']
+            first_name=data.first_name,
+            last_name=data.last_name,
+            email=data.email,
+            phone=data.phone,
+            password_hash=hash_password(data.password),
+            role=data.role
         )
         
         db.session.add(user)
         db.session.commit()
+    except Exception:
+        # Release the reserved email so a corrected registration can use it
+        ride_data.remove_user_email(data.email)
+        raise
+    
+    # Create session
+    session['user_id'] = user.id
+    session['user_role'] = user.role
+    
+    # Cache user session data
+    ride_data.start_user_session(user.id, {
+        'role': user.role,
+        'email': user.email,
+        'login_time': datetime.now().isoformat()
+    })
+    
+    return jsonify(user.to_dict()), 201
+
+@app.route('/api/auth/login', methods=['POST'])
+@limiter.limit('10 per minute')
+def login():
+    """Login user"""
+    data = parse_body(LoginIn)
+    
+    user = User.query.filter_by(email=data.email).first()
+    
+    if user and verify_password(user.password_hash, data.password):
+        # Upgrade legacy pbkdf2 hashes to argon2id on successful login
+        if password_needs_rehash(user.password_hash):
+            user.password_hash = hash_password(data.password)
+            db.session.commit()
         
-        # Create session
         session['user_id'] = user.id
         session['user_role'] = user.role
         
         # Cache user session data
-        ride_data.user_sessions[user.id] = {
+        ride_data.start_user_session(user.id, {
             'role': user.role,
             'email': user.email,
             'login_time': datetime.now().isoformat()
-        }
+        })
         
-        return jsonify(user.to_dict()), 201
+        # Add to active drivers set if driver
+        if user.role == 'driver':
+            ride_data.add_active_driver(user.id)
         
-    except Exception as e:
-        return jsonify({'message': 'Registration failed', 'error': str(e)}), 500
-
-@app.route('/api/auth/login', methods=['POST'])
-def login():
-    """Login user"""
-    try:
-        data = request.get_json()
-        
-        if 'email' not in data or 'password' not in data:
-            return jsonify({'message': 'Email and password required'}), 400
-        
-        user = User.query.filter_by(email=data['email']).first()
-        
-        if user and check_password_hash(user.password_hash, data['password']):
-            session['user_id'] = user.id
-            session['user_role'] = user.role
-            
-            # Cache user session data
-            ride_data.user_sessions[user.id] = {
-                'role': user.role,
-                'email': user.email,
-                'login_time': datetime.now().isoformat()
-            }
-            
-            # Add to active drivers set if driver
-            if user.role == 'driver':
-                ride_data.active_drivers.add(user.id)
-            
-            return jsonify(user.to_dict()), 200
-        else:
-            return jsonify({'message': 'Invalid credentials'}), 401
-            
-    except Exception as e:
-        return jsonify({'message': 'Login failed', 'error': str(e)}), 500
+        return jsonify(user.to_dict()), 200
+    else:
+        return jsonify({'message': 'Invalid credentials'}), 401
 
 @app.route('/api/auth/logout', methods=['POST'])
 def logout():
     """Logout user"""
-    try:
-        user_id = session.get('user_id')
-        
-        # Remove from active drivers if driver
-        if user_id and user_id in ride_data.active_drivers:
-            ride_data.active_drivers.remove(user_id)
-            
-        # Clear session data
-        if user_id and user_id in ride_data.user_sessions:
-            del ride_data.user_sessions[user_id]
-            
-        session.clear()
-        return jsonify({'message': 'Logged out successfully'}), 200
+    user_id = session.get('user_id')
+    
+    # Remove from active drivers and clear session data
+    if user_id:
+        ride_data.end_user_session(user_id)
         
-    except Exception as e:
-        return jsonify({'message': 'Logout failed', 'error': str(e)}), 500
+    session.clear()
+    return jsonify({'message': 'Logged out successfully'}), 200
 
 @app.route('/api/auth/me', methods=['GET'])
 @require_auth
 def get_current_user():
     """Get current user data"""
-    try:
-        user = User.query.get(session['user_id'])
-        if not user:
-            return jsonify({'message': 'User not found'}), 404
-        return jsonify(user.to_dict()), 200
-    except Exception as e:
-        return jsonify({'message': 'Failed to get user', 'error': str(e)}), 500
+    user_data = get_user_data(session['user_id'])
+    if not user_data:
+        return jsonify({'message': 'User not found'}), 404
+    return jsonify(user_data), 200
 
 @app.route('/api/rides', methods=['POST'])
 @require_auth
 def create_ride():
     """Create a new ride (drivers only)"""
-    try:
-        if session.get('user_role') != 'driver':
-            return jsonify({'message': 'Only drivers can post rides'}), 403
-            
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['origin', 'destination', 'date', 'time', 'availableSeats', 'price', 'vehicleType']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'message': f'Missing field: {field}'}), 400
-        
-        ride = Ride(
-            driver_id=session['user_id'],
-            origin=data['origin'],
-            destination=data['destination'],
-            date=data['date'],
-            time=data['time'],
-            available_seats=data['availableSeats'],
-            price=data['price'],
-            vehicle_type=data['vehicleType'],
-            notes=data.get('notes', '')
-        )
-        
-        db.session.add(ride)
-        db.session.commit()
-        
-        # Add to active rides list
-        ride_data.active_rides.append(ride.id)
-        
-        # Cache ride data
-        ride_data.cache_ride(ride.id, ride.to_dict())
-        
-        # Update driver rides mapping
-        driver_id = session['user_id']
-        if driver_id not in ride_data.driver_rides:
-            ride_data.driver_rides[driver_id] = []
-        ride_data.driver_rides[driver_id].append(ride.id)
-        
-        return jsonify(ride.to_dict()), 201
+    if session.get('user_role') != 'driver':
+        return jsonify({'message': 'Only drivers can post rides'}), 403
         
-    except Exception as e:
-        return jsonify({'message': 'Failed to create ride', 'error': str(e)}), 500
+    # Validate and coerce required fields
+    data = parse_body(RideIn)
+    
+    ride = Ride(
+        driver_id=session['user_id'],
+        origin=data.origin,
+        destination=data.destination,
+        origin_h3=h3_cell(data.origin_lat, data.origin_lng),
+        destination_h3=h3_cell(data.destination_lat, data.destination_lng),
+        date=data.date,
+        time=data.time,
+        available_seats=data.available_seats,
+        price=data.price,
+        vehicle_type=data.vehicle_type,
+        notes=data.notes
+    )
+    
+    db.session.add(ride)
+    db.session.commit()
+    
+    # New ride must show up in searches
+    cache.delete_memoized(find_active_rides)
+    
+    # Add to active rides list and driver rides mapping, and cache ride data
+    ride_dict = ride.to_dict()
+    ride_data.register_ride(ride.id, session['user_id'], ride_dict)
+    
+    return jsonify(ride_dict), 201
 
 @app.route('/api/rides/search', methods=['GET'])
 def search_rides():
     """Search for available rides"""
-    try:
-        # Get search parameters
-        origin = request.args.get('origin', '')
-        destination = request.args.get('destination', '')
-        date = request.args.get('date', '')
-        
-        # Add to search history (demonstrating list usage)
-        search_params = {
-            'origin': origin,
-            'destination': destination,
-            'date': date,
-            'timestamp': datetime.now().isoformat()
-        }
-        ride_data.add_to_search_history(search_params)
-        
-        # Build query
-        query = Ride.query.filter_by(status='active')
-        
-        if origin:
-            query = query.filter(Ride.origin.ilike(f'%{origin}%'))
-        if destination:
-            query = query.filter(Ride.destination.ilike(f'%{destination}%'))
-        if date:
-            query = query.filter_by(date=date)
-            
-        rides = query.order_by(Ride.created_at.desc()).all()
-        
-        # Convert to list of dictionaries with driver info
-        result = []
-        for ride in rides:
-            ride_dict = ride.to_dict(include_driver=True)
-            result.append(ride_dict)
-            
-            # Cache each ride
-            ride_data.cache_ride(ride.id, ride_dict)
-        
-        return jsonify(result), 200
-        
-    except Exception as e:
-        return jsonify({'message': 'Search failed', 'error': str(e)}), 500
+    # Get and validate search parameters
+    params = parse_args(RideSearchIn)
+    origin = params.origin
+    destination = params.destination
+    date = params.date
+    origin_cell = h3_cell(params.origin_lat, params.origin_lng)
+    destination_cell = h3_cell(params.destination_lat, params.destination_lng)
+    
+    # Add to search history (demonstrating list usage)
+    search_params = {
+        'origin': origin,
+        'destination': destination,
+        'date': date,
+        'timestamp': datetime.now().isoformat()
+    }
+    ride_data.add_to_search_history(search_params)
+    
+    result = find_active_rides(origin, destination, date, origin_cell, destination_cell)
+    
+    # Cache each ride
+    ride_data.cache_rides(result)
+    
+    return jsonify(result), 200
 
 @app.route('/api/rides/my', methods=['GET'])
 @require_auth
 def get_my_rides():
     """Get rides posted by the current driver"""
-    try:
-        if session.get('user_role') != 'driver':
-            return jsonify({'message': 'Only drivers can view posted rides'}), 403
-            
-        rides = Ride.query.filter_by(driver_id=session['user_id']).order_by(Ride.created_at.desc()).all()
-        result = [ride.to_dict() for ride in rides]
+    if session.get('user_role') != 'driver':
+        return jsonify({'message': 'Only drivers can view posted rides'}), 403
         
-        return jsonify(result), 200
-        
-    except Exception as e:
-        return jsonify({'message': 'Failed to get rides', 'error': str(e)}), 500
+    rides = Ride.query.filter_by(driver_id=session['user_id']).order_by(Ride.created_at.desc()).all()
+    result = dump_list(ride_list_adapter, rides)
+    
+    return jsonify(result), 200
 
 @app.route('/api/requests', methods=['POST'])
 @require_auth
 def create_ride_request():
     """Create a ride request (riders only)"""
-    try:
-        if session.get('user_role') != 'rider':
-            return jsonify({'message': 'Only riders can request rides'}), 403
-            
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['rideId', 'seats']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'message': f'Missing field: {field}'}), 400
-        
-        # Check if ride exists and has available seats
-        ride = Ride.query.get(data['rideId'])
-        if not ride:
-            return jsonify({'message': 'Ride not found'}), 404
-            
-        if ride.available_seats < data['seats']:
-            return jsonify({'message': 'Not enough available seats'}), 400
-        
-        # Create ride request
-        ride_request = RideRequest(
-            ride_id=data['rideId'],
-            rider_id=session['user_id'],
-            seats=data['seats'],
-            message=data.get('message', '')
-        )
-        
-        db.session.add(ride_request)
-        db.session.commit()
+    if session.get('user_role') != 'rider':
+        return jsonify({'message': 'Only riders can request rides'}), 403
         
-        return jsonify(ride_request.to_dict()), 201
+    # Validate and coerce required fields
+    data = parse_body(RideRequestIn)
+    
+    # Check if ride exists and has available seats
+    ride = Ride.query.get(data.ride_id)
+    if not ride:
+        return jsonify({'message': 'Ride not found'}), 404
         
-    except Exception as e:
-        return jsonify({'message': 'Failed to create request', 'error': str(e)}), 500
+    if ride.available_seats < data.seats:
+        return jsonify({'message': 'Not enough available seats'}), 400
+    
+    # Create ride request
+    ride_request = RideRequest(
+        ride_id=data.ride_id,
+        rider_id=session['user_id'],
+        seats=data.seats,
+        message=data.message
+    )
+    
+    db.session.add(ride_request)
+    db.session.commit()
+    
+    return jsonify(ride_request.to_dict()), 201
 
 @app.route('/api/requests/my', methods=['GET'])
 @require_auth
 def get_my_requests():
     """Get requests based on user role"""
-    try:
-        user_role = session.get('user_role')
-        user_id = session['user_id']
-        
-        if user_role == 'driver':
-            # Get requests for driver's rides
-            requests = db.session.query(RideRequest).join(Ride).filter(
-                Ride.driver_id == user_id
-            ).order_by(RideRequest.created_at.desc()).all()
+    user_role = session.get('user_role')
+    user_id = session['user_id']
+    
+    if user_role == 'driver':
+        # Get requests for driver's rides; the ride comes from the filter
+        # join and riders are fetched in one extra IN query
+        requests = db.session.query(RideRequest).join(RideRequest.ride).options(
+            contains_eager(RideRequest.ride).joinedload(Ride.driver),
+            selectinload(RideRequest.rider)
+        ).filter(
+            Ride.driver_id == user_id
+        ).order_by(RideRequest.created_at.desc()).all()
+        
+        result = dump_list(driver_request_list_adapter, requests)
             
-            result = []
-            for req in requests:
-                req_dict = req.to_dict(include_rider=True)
-                req_dict['ride'] = req.ride.to_dict()
-                result.append(req_dict)
-                
-        else:  # rider
-            # Get requests made by rider
-            requests = RideRequest.query.filter_by(rider_id=user_id).order_by(RideRequest.created_at.desc()).all()
-            result = [req.to_dict(include_ride=True) for req in requests]
-        
-        return jsonify(result), 200
-        
-    except Exception as e:
-        return jsonify({'message': 'Failed to get requests', 'error': str(e)}), 500
+    else:  # rider
+        # Get requests made by rider, loading rides and drivers in one IN query
+        requests = RideRequest.query.options(
+            selectinload(RideRequest.ride).joinedload(Ride.driver)
+        ).filter_by(rider_id=user_id).order_by(RideRequest.created_at.desc()).all()
+        result = dump_list(rider_request_list_adapter, requests)
+    
+    return jsonify(result), 200
 
 @app.route('/api/requests/<int:request_id>', methods=['PATCH'])
 @require_auth
 def update_request_status(request_id):
     """Update ride request status (drivers only)"""
-    try:
-        if session.get('user_role') != 'driver':
-            return jsonify({'message': 'Only drivers can update request status'}), 403
-            
-        data = request.get_json()
-        status = data.get('status')
-        
-        if status not in ['accepted', 'declined']:
-            return jsonify({'message': 'Invalid status'}), 400
-        
-        ride_request = RideRequest.query.get(request_id)
-        if not ride_request:
-            return jsonify({'message': 'Request not found'}), 404
-            
-        # Get the ride and verify the driver owns it
-        ride = Ride.query.get(ride_request.ride_id)
-        if not ride or ride.driver_id != session['user_id']:
-            return jsonify({'message': 'Unauthorized'}), 403
-        
-        ride_request.status = status
-        
-        # If accepted, reduce available seats
-        if status == 'accepted':
-            ride.available_seats -= ride_request.seats
-            
-            # Remove from active rides if no seats left
-            if ride.available_seats <= 0 and ride.id in ride_data.active_rides:
-                ride_data.active_rides.remove(ride.id)
+    if session.get('user_role') != 'driver':
+        return jsonify({'message': 'Only drivers can update request status'}), 403
         
-        db.session.commit()
+    data = get_json_object()
+    status = data.get('status')
+    
+    if status not in ['accepted', 'declined']:
+        return jsonify({'message': 'Invalid status'}), 400
+    
+    ride_request = RideRequest.query.get(request_id)
+    if not ride_request:
+        return jsonify({'message': 'Request not found'}), 404
         
-        return jsonify({'message': 'Request updated successfully'}), 200
+    # Get the ride and verify the driver owns it
+    ride = Ride.query.get(ride_request.ride_id)
+    if not ride or ride.driver_id != session['user_id']:
+        return jsonify({'message': 'Unauthorized'}), 403
+    
+    ride_request.status = status
+    
+    # If accepted, reduce available seats
+    if status == 'accepted':
+        ride.available_seats -= ride_request.seats
         
-    except Exception as e:
-        return jsonify({'message': 'Failed to update request', 'error': str(e)}), 500
+        # Keep the status in step with the seat count: full when none are
+        # left, active again when a full ride has seats
+        if ride.available_seats <= 0:
+            ride.status = 'full'
+            ride_data.remove_active_ride(ride.id)
+        elif ride.status == 'full':
+            ride.status = 'active'
+            ride_data.add_active_ride(ride.id, ride.driver_id)
+    
+    db.session.commit()
+    
+    # Seat counts changed, so cached search results are stale
+    if status == 'accepted':
+        cache.delete_memoized(find_active_rides)
+    
+    return jsonify({'message': 'Request updated successfully'}), 200
 
 @app.route('/api/data-structures/demo', methods=['GET'])
+@cache.cached(timeout=10)
 def demo_data_structures():
     """Demonstrate the data structures being used"""
+    stats = ride_data.get_stats()
     return jsonify({
         'message': 'Data Structures Demo',
         'structures': {
             'lists': {
-                'active_rides': len(ride_data.active_rides),
-                'search_history': len(ride_data.search_history),
+                'active_rides': stats['active_rides'],
+                'search_history': stats['search_history'],
                 'description': 'Used for ordered collections, easy iteration, dynamic sizing'
             },
             'dictionaries': {
-                'user_sessions': len(ride_data.user_sessions),
-                'ride_cache': len(ride_data.ride_cache),
-                'driver_rides': len(ride_data.driver_rides),
+                'user_sessions': stats['user_sessions'],
+                'ride_cache': stats['ride_cache'],
+                'driver_rides': stats['driver_rides'],
                 'description': 'Used for fast O(1) lookups, key-value mapping, caching'
             },
             'sets': {
-                'unique_emails': len(ride_data.unique_emails),
-                'active_drivers': len(ride_data.active_drivers),
-                'blocked_users': len(ride_data.blocked_users),
+                'unique_emails': stats['unique_emails'],
+                'active_drivers': stats['active_drivers'],
+                'blocked_users': stats['blocked_users'],
                 'description': 'Used for uniqueness, fast membership testing, no duplicates'
             },
             'tuples': {
-                'popular_routes': len(ride_data.popular_routes),
+                'popular_routes': stats['popular_routes'],
                 'description': 'Used for immutable grouped data, coordinate pairs'
             }
         },
-        'recent_searches': ride_data.search_history[-3:] if ride_data.search_history else []
+        'recent_searches': ride_data.get_recent_searches(3)
     }), 200
 
+# Error handlers
+@app.errorhandler(InvalidRequest)
+def handle_invalid_request(e):
+    """Report request bodies that failed validation"""
+    return jsonify({'message': str(e)}), 400
+
+@app.errorhandler(HTTPException)
+def handle_http_error(e):
+    """Return HTTP errors (bad JSON, rate limits, ...) as JSON like the rest of the API"""
+    # Keep headers such as Allow (405) and Retry-After (429), minus the HTML content type
+    headers = [(name, value) for name, value in e.get_headers() if name.lower() != 'content-type']
+    return jsonify({'message': e.name, 'error': e.description}), e.code, headers
+
+@app.errorhandler(IntegrityError)
+def handle_integrity_error(e):
+    """Report constraint violations such as a duplicate email as a conflict"""
+    app.logger.warning('Integrity error on %s %s: %s', request.method, request.path, e.orig)
+    db.session.rollback()
+    return jsonify({'message': 'Conflict with existing data'}), 409
+
+@app.errorhandler(SQLAlchemyError)
+def handle_database_error(e):
+    """Roll back the failed transaction so the session stays usable"""
+    app.logger.exception('Database error on %s %s', request.method, request.path)
+    db.session.rollback()
+    return jsonify({'message': 'Database error'}), 500
+
 # Serve React frontend
 @app.route('/')
 def serve_frontend():
@@ -581,7 +1079,7 @@ def serve_static(path):
     """Serve static files or fallback to React app"""
     try:
         return send_from_directory(app.static_folder, path)
-    except:
+    except NotFound:
         # Fallback to React app for client-side routing
         return send_from_directory(app.static_folder, 'index.html')
 
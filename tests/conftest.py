@@ -0,0 +1,39 @@
+import os
+
+# Route tests run against a throwaway in-memory database and in-process stores;
+# set before app is imported so its config picks them up
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.pop('REDIS_URL', None)
+
+import pytest
+
+import app as app_module
+from app import RideShareDataStructures, app, cache, db, limiter
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client with empty tables, cache, rate limits and ride_data"""
+    monkeypatch.setattr(app_module, 'ride_data', RideShareDataStructures())
+    with app.app_context():
+        db.create_all()
+        cache.clear()
+        limiter.reset()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def driver(client):
+    """Client logged in as a freshly registered driver"""
+    response = client.post('/api/auth/register', json={
+        'firstName': 'Dana',
+        'lastName': 'Driver',
+        'email': 'driver@example.com',
+        'phone': '555-0100',
+        'password': 'secret',
+        'role': 'driver'
+    })
+    assert response.status_code == 201
+    return client
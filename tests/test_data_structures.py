@@ -0,0 +1,66 @@
+import fakeredis
+import pytest
+
+from app import RedisRideShareDataStructures, RideShareDataStructures
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def structures(request):
+    """Both ride_data backends, so they are held to the same behaviour"""
+    if request.param == 'redis':
+        return RedisRideShareDataStructures(fakeredis.FakeRedis())
+    return RideShareDataStructures()
+
+
+def test_search_history_keeps_last_ten(structures):
+    for i in range(12):
+        structures.add_to_search_history({'origin': f'origin {i}'})
+    
+    assert structures.get_stats()['search_history'] == 10
+    assert structures.get_recent_searches(3) == [
+        {'origin': 'origin 9'}, {'origin': 'origin 10'}, {'origin': 'origin 11'}
+    ]
+
+
+def test_recent_searches_empty(structures):
+    assert structures.get_recent_searches(3) == []
+
+
+def test_user_email_reservation(structures):
+    assert structures.add_user_email('a@example.com')
+    assert not structures.add_user_email('a@example.com')
+    
+    structures.remove_user_email('a@example.com')
+    assert structures.add_user_email('a@example.com')
+
+
+def test_get_stats(structures):
+    structures.add_user_email('a@example.com')
+    structures.start_user_session(1, {'role': 'driver'})
+    structures.add_active_driver(1)
+    structures.register_ride(10, 1, {'id': 10})
+    structures.register_ride(11, 1, {'id': 11})
+    structures.cache_rides([{'id': 12}])
+    structures.remove_active_ride(11)
+    
+    assert structures.get_stats() == {
+        'active_rides': 1,
+        'search_history': 0,
+        'user_sessions': 1,
+        'ride_cache': 3,
+        'driver_rides': 1,
+        'unique_emails': 1,
+        'active_drivers': 1,
+        'blocked_users': 0,
+        'popular_routes': 3
+    }
+    
+    structures.end_user_session(1)
+    stats = structures.get_stats()
+    assert stats['user_sessions'] == 0
+    assert stats['active_drivers'] == 0
+
+
+def test_popular_route_suggestions(structures):
+    assert structures.get_popular_route_suggestions('pune station') == ['Hadapsar']
+    assert structures.get_popular_route_suggestions('Nowhere') == []
@@ -0,0 +1,116 @@
+RIDE = {
+    'origin': 'Downtown',
+    'destination': 'Airport',
+    'date': '2026-01-01',
+    'time': '09:00',
+    'availableSeats': 3,
+    'price': 20,
+    'vehicleType': 'sedan'
+}
+
+
+def test_search_finds_nearby_ride(driver):
+    response = driver.post('/api/rides', json={
+        **RIDE, 'originLat': 40.7128, 'originLng': -74.0060
+    })
+    assert response.status_code == 201
+    
+    # A few hundred metres away still lands in the same or a neighbouring cell
+    nearby = driver.get('/api/rides/search?originLat=40.7140&originLng=-74.0070')
+    assert [ride['id'] for ride in nearby.get_json()] == [response.get_json()['id']]
+    
+    far = driver.get('/api/rides/search?originLat=34.0522&originLng=-118.2437')
+    assert far.get_json() == []
+
+
+def test_create_ride_rejects_out_of_range_coordinates(driver):
+    response = driver.post('/api/rides', json={**RIDE, 'originLat': 200, 'originLng': 0})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Invalid field: originLat'}
+
+
+def test_create_ride_rejects_unpaired_coordinates(driver):
+    response = driver.post('/api/rides', json={**RIDE, 'destinationLat': 10})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'destinationLat and destinationLng must be given together'}
+
+
+def test_search_rejects_invalid_coordinates(client):
+    for query in ['originLat=nan&originLng=0', 'originLat=0&originLng=inf', 'originLat=200&originLng=0']:
+        response = client.get(f'/api/rides/search?{query}')
+        assert response.status_code == 400, query
+    
+    response = client.get('/api/rides/search?originLat=10')
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'originLat and originLng must be given together'}
+
+
+def test_register_rejects_wrongly_typed_fields(client):
+    user = {
+        'firstName': 'Rae',
+        'lastName': 'Rider',
+        'email': 'rider@example.com',
+        'phone': '555-0101',
+        'password': 'secret',
+        'role': 'rider'
+    }
+    response = client.post('/api/auth/register', json={**user, 'password': 123})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Invalid field: password'}
+    
+    response = client.post('/api/auth/register', json={**user, 'email': ['q']})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Invalid field: email'}
+    
+    response = client.post('/api/auth/register', json={k: v for k, v in user.items() if k != 'phone'})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Missing field: phone'}
+    
+    # Rejected attempts must not hold on to the email
+    assert client.post('/api/auth/register', json=user).status_code == 201
+
+
+def test_login_rejects_wrongly_typed_fields(driver):
+    response = driver.post('/api/auth/login', json={'email': 'driver@example.com', 'password': 123})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Invalid field: password'}
+    
+    response = driver.post('/api/auth/login', json={'email': 'driver@example.com'})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Missing field: password'}
+    
+    response = driver.post('/api/auth/login', json={'email': 'driver@example.com', 'password': 'secret'})
+    assert response.status_code == 200
+
+
+def test_create_ride_rejects_bad_seats_and_price(driver):
+    for field, value in [('availableSeats', 0), ('availableSeats', -1), ('price', -5)]:
+        response = driver.post('/api/rides', json={**RIDE, field: value})
+        assert response.status_code == 400
+        assert response.get_json() == {'message': f'Invalid field: {field}'}
+
+
+def test_accepting_last_seats_marks_ride_full(driver):
+    ride_id = driver.post('/api/rides', json={**RIDE, 'availableSeats': 2}).get_json()['id']
+    
+    # Switch the session to a rider
+    driver.post('/api/auth/register', json={
+        'firstName': 'Rae',
+        'lastName': 'Rider',
+        'email': 'rider@example.com',
+        'phone': '555-0101',
+        'password': 'secret',
+        'role': 'rider'
+    })
+    response = driver.post('/api/requests', json={'rideId': ride_id, 'seats': -3})
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Invalid field: seats'}
+    request_id = driver.post('/api/requests', json={'rideId': ride_id, 'seats': 2}).get_json()['id']
+    
+    driver.post('/api/auth/login', json={'email': 'driver@example.com', 'password': 'secret'})
+    response = driver.patch(f'/api/requests/{request_id}', json={'status': 'accepted'})
+    assert response.status_code == 200
+    
+    rides = driver.get('/api/rides/my').get_json()
+    assert [(ride['availableSeats'], ride['status']) for ride in rides] == [(0, 'full')]
+    assert driver.get('/api/rides/search').get_json() == []